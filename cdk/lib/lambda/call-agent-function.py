@@ -1,16 +1,141 @@
 import json
-import boto3
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 import os
 import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+import botocore.session
+from botocore.config import Config
+from botocore.exceptions import ClientError
 
-# クライアントの初期化
-bedrock_client = boto3.client('bedrock-agent-runtime', region_name='us-east-1')
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-table = dynamodb.Table('students-evaluation')
-# SNSクライアントを初期化
-sns = boto3.client('sns', region_name='us-east-1')
+# 生徒評価を並列実行する際の最大スレッド数
+# 同時に開始するエージェントセッション数がスロットリングの原因になるため、既定値は小さくしておく
+MAX_WORKERS = int(os.environ.get('MAX_WORKERS', '3'))
+# スロットリング時の最大リトライ回数
+MAX_THROTTLE_RETRIES = 4
+# リトライ対象とするスロットリング系のエラーコード
+# （Bedrock Agentはレスポンスストリームの途中でもこれらを例外イベントとして返す）
+THROTTLE_ERROR_CODES = {
+    'throttlingException',
+    'ThrottlingException',
+    'serviceQuotaExceededException',
+    'ServiceQuotaExceededException',
+}
+# 評価結果を保存するDynamoDBテーブル名
+TABLE_NAME = 'students-evaluation'
+# Bedrock Agentの定義（環境変数はコンテナ起動時に一度だけ読み込む）
+AGENT_ID = os.environ['AGENT_ID']
+AGENT_ALIAS_ID = os.environ['AGENT_ALIAS_ID']
+# 通知先のSNSトピック（未設定の場合は通知しない）
+SNS_TOPIC_ARN = os.environ.get('SNS_TOPIC_ARN')
+# トレースはハンドラーで使用しないため、ENABLE_TRACE=1 のときのみ有効にする
+ENABLE_TRACE = os.environ.get('ENABLE_TRACE') == '1'
+
+# クライアント共通の設定
+# 並列実行するスレッド数分の接続プールを確保し、TCPキープアライブで接続を使い回す
+# スロットリングはbotocoreのadaptiveリトライモードで吸収する
+CLIENT_CONFIG = Config(
+    max_pool_connections=MAX_WORKERS,
+    tcp_keepalive=True,
+    retries={'max_attempts': 5, 'mode': 'adaptive'}
+)
+
+# クライアントの初期化（boto3を介さずbotocoreのセッションから直接作成する）
+_bs = botocore.session.get_session()
+bedrock_client = _bs.create_client('bedrock-agent-runtime', region_name='us-east-1', config=CLIENT_CONFIG)
+# DynamoDBはリソースAPIではなく低レベルクライアントで直接操作する
+ddb = _bs.create_client('dynamodb', region_name='us-east-1', config=CLIENT_CONFIG)
+# SNSクライアントは通知時にのみ初期化する（コールドスタート短縮のため）
+_sns = None
+
+def get_sns_client():
+    """
+    SNSクライアントを初回利用時に作成し、ウォームなコンテナ内で再利用します。
+    """
+    global _sns
+    if _sns is None:
+        _sns = _bs.create_client('sns', region_name=os.environ.get('AWS_REGION', 'us-east-1'), config=CLIENT_CONFIG)
+    return _sns
+
+def invoke_agent(input_text):
+    """
+    Bedrock Agentを1回呼び出し、レスポンスストリームを読み切ってテキストを返します。
+    """
+    # 生徒ごとに並列実行するため、セッションは共有せず毎回新しいIDを使う
+    # （再実行時に前回の評価の会話が引き継がれたり、実行が重なって競合したりしないようにする）
+    session_id = str(uuid.uuid4())
+
+    # Invoke Agent APIを呼び出す
+    response = bedrock_client.invoke_agent(
+        agentId=AGENT_ID,
+        agentAliasId=AGENT_ALIAS_ID,
+        sessionId=session_id,
+        inputText=input_text,
+        enableTrace=ENABLE_TRACE,
+        streamingConfigurations={
+            "streamFinalResponse": False
+        }
+    )
+
+    # レスポンスからテキストを抽出
+    # EventStreamを適切に処理
+    buf = bytearray()
+    event_stream = response["completion"]
+
+    # EventStreamをループして応答のバイナリデータを収集
+    for stream_event in event_stream:
+        if 'chunk' in stream_event:
+            chunk = stream_event['chunk']
+            if 'bytes' in chunk:
+                buf.extend(chunk['bytes'])
+    # 最後に一度だけデコードする（チャンク境界で分割されたマルチバイト文字も正しく復元される）
+    return buf.decode('utf-8')
+
+def process_student(current_id, period):
+    """
+    1名分の生徒についてBedrock Agentで評価を行い、結果をDynamoDBに保存します。
+    """
+    input_text = (f"出席番号: {str(current_id)} の生徒の評価を行ってください。 期間は {period} です。")
+
+    # 初回のHTTPリクエストはbotocoreのリトライで再試行されるが、ストリーム途中の
+    # スロットリング（EventStreamError）は再試行されないため、呼び出し全体を再試行する
+    for attempt in range(MAX_THROTTLE_RETRIES + 1):
+        try:
+            agent_response = invoke_agent(input_text)
+            break
+        except ClientError as e:
+            # EventStreamErrorもClientErrorのサブクラスとして捕捉される
+            if e.response['Error']['Code'] not in THROTTLE_ERROR_CODES or attempt == MAX_THROTTLE_RETRIES:
+                raise
+            wait = random.uniform(0, 2 ** attempt)
+            print(f"出席番号 {current_id}: スロットリングが発生しました。{wait:.1f}秒後に再試行します（{attempt + 1}回目）")
+            time.sleep(wait)
+
+    print(f"Bedrock Agentからのレスポンス: {agent_response}")
+
+    # タイムスタンプを生成（ISO形式）- DynamoDBの属性名として使用するために安全に変換
+    # LambdaのローカルタイムゾーンはUTCのため、明示的にUTCで生成する
+    timestamp = datetime.now(tz=timezone.utc).strftime('%Y-%m-%dT%H_%M_%S_%f')
+
+    # DynamoDBに評価結果を追加
+    # 同じ項目には生徒データや教師評価も保存されているため、BatchWriteItem（項目全体の置換）
+    # ではなくupdate_itemで評価属性のみを更新する。書き込みは生徒ごとのスレッドで並列に実行される
+    ddb.update_item(
+        TableName=TABLE_NAME,
+        Key={
+            'students_id': {'S': str(current_id)},
+            'period': {'S': period}
+        },
+        UpdateExpression='SET agent_evaluation = :eval, evaluation_date = :date',
+        ExpressionAttributeValues={
+            ':eval': {'S': agent_response},
+            ':date': {'S': timestamp}
+        }
+    )
+    return {
+        'id': str(current_id)
+    }
 
 def lambda_handler(event, context):
     try:
@@ -18,72 +143,21 @@ def lambda_handler(event, context):
 
         # EventBridgeから渡されたペイロードを取得
         students_id = event.get('students_id', '1')
-        period = event.get('period', '2025-01')
+        period = event.get('period', '202504')
         # ループ回数を指定（例: 3回）
         loop_count = int(event.get('loop_count', 3))
-        # students_idをintに変換
-        current_id = int(students_id)
+        # students_idをintに変換し、評価対象のID一覧を作成
+        ids = [int(students_id) + i for i in range(loop_count)]
         results = []
-        for i in range(loop_count):
-            input_text = (f"出席番号: {str(current_id)} の生徒の評価を行ってください。 期間は {period} です。")
-            # Bedrock Agentの定義
-            agent_id = os.environ['AGENT_ID']
-            agent_alias_id = os.environ['AGENT_ALIAS_ID']
-            session_id = str(uuid.uuid4())
-            
-            # Invoke Agent APIを呼び出す
-            response = bedrock_client.invoke_agent(
-                agentId=agent_id,
-                agentAliasId=agent_alias_id,
-                sessionId=session_id,
-                inputText=input_text,
-                enableTrace=True,
-                streamingConfigurations={
-                    "streamFinalResponse": False
-                }
-            )
+        if ids:
+            # 各生徒の評価は独立したI/O待ちのため、スレッドで並列に実行する
+            with ThreadPoolExecutor(max_workers=min(loop_count, MAX_WORKERS)) as executor:
+                results = list(executor.map(lambda current_id: process_student(current_id, period), ids))
 
-            # レスポンスからテキストを抽出
-            # EventStreamを適切に処理
-            agent_response = ""
-            event_stream = response["completion"]
-            
-            # EventStreamをループして応答テキストを収集
-            for event in event_stream:
-                if 'chunk' in event:
-                    chunk = event['chunk']
-                    if 'bytes' in chunk:
-                        # バイナリデータをデコード
-                        text = chunk['bytes'].decode('utf-8')
-                        agent_response += text
-            
-            print(f"Bedrock Agentからのレスポンス: {agent_response}")
-
-            # タイムスタンプを生成（ISO形式）- DynamoDBの属性名として使用するために安全に変換
-            timestamp = datetime.now().isoformat().replace(':', '_').replace('.', '_')
-
-            # DynamoDBに評価結果を追加
-            table.update_item(
-                Key={
-                    'students_id': str(current_id),
-                    'period': period
-                },
-                UpdateExpression='SET agent_evaluation = :eval, evaluation_date = :date',
-                ExpressionAttributeValues={
-                    ':eval': agent_response,
-                    ':date': timestamp
-                }
-            )
-            results.append({
-                'id': str(current_id)
-            })
-            current_id += 1
-            time.sleep(30)
-            
         # 処理成功の通知をSNSトピックに送信
-        if 'SNS_TOPIC_ARN' in os.environ:
-            sns.publish(
-                TopicArn=os.environ['SNS_TOPIC_ARN'],
+        if SNS_TOPIC_ARN:
+            get_sns_client().publish(
+                TopicArn=SNS_TOPIC_ARN,
                 Subject='生徒評価処理完了通知',
                 Message=f'以下の生徒IDの評価処理が正常に完了しました。\n期間: {period}\n処理したID: {[result["id"] for result in results]}'
             )
@@ -101,9 +175,9 @@ def lambda_handler(event, context):
         print(error_message)
         
         # エラー通知をSNSトピックに送信
-        if 'SNS_TOPIC_ARN' in os.environ:
-            sns.publish(
-                TopicArn=os.environ['SNS_TOPIC_ARN'],
+        if SNS_TOPIC_ARN:
+            get_sns_client().publish(
+                TopicArn=SNS_TOPIC_ARN,
                 Subject='生徒評価処理エラー通知',
                 Message=f'処理中にエラーが発生しました。\n期間: {period}\n開始ID: {students_id}\nエラー: {str(e)}'
             )
@@ -1,16 +1,53 @@
 import logging
 import json
-import boto3
+import botocore.session
+from decimal import Decimal
 from typing import Dict, Any
 from http import HTTPStatus
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# DynamoDBクライアントの初期化
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table('students-evaluation')
+TABLE_NAME = 'students-evaluation'
+
+# DynamoDBクライアントの初期化（TCPキープアライブで接続を使い回す）
+CLIENT_CONFIG = Config(
+    max_pool_connections=10,
+    tcp_keepalive=True,
+    retries={'max_attempts': 5, 'mode': 'adaptive'}
+)
+ddb = botocore.session.get_session().create_client('dynamodb', config=CLIENT_CONFIG)
+# 初回呼び出し時の遅延ロードを避けるため、GetItemのオペレーションモデルをコールドスタート時に読み込んでおく
+ddb.meta.service_model.operation_model('GetItem')
+
+def deserialize(value: Dict[str, Any]) -> Any:
+    """
+    DynamoDBの型付き属性値（{'S': ...}など）をPythonの値に変換します。
+    
+    Args:
+        value (Dict[str, Any]): DynamoDBの属性値
+    
+    Returns:
+        Any: 変換後の値
+    """
+    (type_name, data), = value.items()
+    if type_name in ('S', 'B', 'BOOL'):
+        return data
+    if type_name == 'N':
+        return Decimal(data)
+    if type_name == 'NULL':
+        return None
+    if type_name == 'M':
+        return {k: deserialize(v) for k, v in data.items()}
+    if type_name == 'L':
+        return [deserialize(v) for v in data]
+    if type_name in ('SS', 'BS'):
+        return set(data)
+    if type_name == 'NS':
+        return {Decimal(v) for v in data}
+    raise TypeError(f'未対応のDynamoDB型です: {type_name}')
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -37,8 +74,9 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         if function == 'get-data-from-dynamodb':
             # パラメータから学生IDと期間を取得
-            students_id = next((param['value'] for param in parameters if param['name'] == 'students_id'), None)
-            period = next((param['value'] for param in parameters if param['name'] == 'period'), None)
+            params = {param['name']: param['value'] for param in parameters}
+            students_id = params.get('students_id')
+            period = params.get('period')
             
             if not students_id or not period:
                 response_body = {
@@ -102,26 +140,29 @@ def get_student_evaluation(students_id: str, period: str) -> Dict[str, Any]:
         Dict[str, Any]: 取得した評価データ
     
     Raises:
-        ClientError: DynamoDBへのクエリ実行中にエラーが発生した場合
+        ClientError: DynamoDBからの項目取得（GetItem）中にエラーが発生した場合
     """
     try:
         logger.info(f"学生ID: {students_id}, 期間: {period} のデータを検索中")
         
-        # DynamoDBのクエリパラメータを設定
-        response = table.query(
-            KeyConditionExpression='students_id = :sid AND period = :p',
-            ExpressionAttributeValues={
-                ':sid': students_id,
-                ':p': period
+        # (students_id, period)は主キーのため、queryではなくget_itemで1件を直接取得
+        response = ddb.get_item(
+            TableName=TABLE_NAME,
+            Key={
+                'students_id': {'S': students_id},
+                'period': {'S': period}
             }
         )
         
-        items = response.get('Items', [])
-        logger.info(f"検索結果: {len(items)}件のデータが見つかりました")
+        item = response.get('Item')
+        logger.info(f"検索結果: {1 if item else 0}件のデータが見つかりました")
         
-        if not items:
+        if not item:
             return {"message": "指定された学生IDと期間のデータは見つかりませんでした。"}
         
+        # DynamoDBの型付き属性値をPythonの値に変換
+        items = [{k: deserialize(v) for k, v in item.items()}]
+        
         return {
             "students_id": students_id,
             "period": period,
@@ -129,5 +170,5 @@ def get_student_evaluation(students_id: str, period: str) -> Dict[str, Any]:
         }
         
     except ClientError as e:
-        logger.error(f"DynamoDBクエリエラー: {e.response['Error']['Message']}")
+        logger.error(f"DynamoDB GetItemエラー: {e.response['Error']['Message']}")
         raise
@@ -1,3 +1,6 @@
+import functools
+import textwrap
+
 import boto3
 from strands import Agent
 from strands.models import BedrockModel
@@ -5,17 +8,20 @@ from strands.models import BedrockModel
 from mcp import stdio_client, StdioServerParameters
 from strands.tools.mcp import MCPClient
 
-session = boto3.Session(
-    region_name="ap-northeast-1",
-    #region_name="us-east-1",
-    #profile_name="default",
-)
+@functools.lru_cache(maxsize=None)
+def get_session():
+    # ライブラリとしてimportした側から呼ばれても、同一プロセス内では認証情報の解決を一度だけにする
+    return boto3.Session(
+        region_name="ap-northeast-1",
+        #region_name="us-east-1",
+        #profile_name="default",
+    )
 
 # Create a Bedrock Model
 bedrock_model = BedrockModel(
     #model_id="apac.anthropic.claude-3-7-sonnet-20250219-v1:0",
     model_id="apac.anthropic.claude-sonnet-4-20250514-v1:0",
-    session=session,
+    session=get_session(),
     # cache_prompt="default",
     # cache_tools="default",
 )
@@ -62,9 +68,10 @@ agent = Agent(
     model=bedrock_model,
 )
 
-message = """
-AWS Bedrockで利用可能なAnthropic Claudeの最新モデルは何ですか？
-また、それぞれのモデルの特徴を教えてください。
-"""
+if __name__ == "__main__":
+    message = textwrap.dedent("""
+    AWS Bedrockで利用可能なAnthropic Claudeの最新モデルは何ですか？
+    また、それぞれのモデルの特徴を教えてください。
+    """)
 
-agent(message)
\ No newline at end of file
+    agent(message)
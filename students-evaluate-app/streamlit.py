@@ -2,12 +2,72 @@ import streamlit as st
 import boto3
 import json
 import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, Any, Optional
 
 # タイトルとページ設定
 st.set_page_config(page_title="学生評価システム", layout="wide")
 st.title("学生評価システム")
 
+@st.cache_resource(max_entries=8, ttl=3600)
+def get_session(profile: Optional[str], region: str, key: Optional[str] = None, secret: Optional[str] = None) -> boto3.Session:
+    """
+    boto3のセッションを作成します。
+    Streamlitの再実行ごとに作り直さないよう、入力値ごとにキャッシュします。
+    キャッシュは全ユーザーで共有され認証情報を保持するため、件数と保持時間を制限しています。
+    """
+    if profile:
+        return boto3.Session(profile_name=profile, region_name=region)
+    return boto3.Session(
+        aws_access_key_id=key,
+        aws_secret_access_key=secret,
+        region_name=region
+    )
+
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """
+    API Gateway呼び出し用のHTTPセッションを作成します。
+    ボタン操作をまたいでTCP/TLS接続を再利用します。
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        # 再試行が尽きた場合も最後のレスポンスを返し、既存のステータスコード処理でエラー表示する
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[502, 503, 504],
+            raise_on_status=False
+        )
+    )
+    session.mount('https://', adapter)
+    return session
+
+HTTP = get_http_session()
+# API呼び出しのタイムアウト（接続, 読み取り）秒
+HTTP_TIMEOUT = (3.05, 10)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_evaluation(api_endpoint: str, students_id: str, period: str) -> Dict[str, Any]:
+    """
+    API Gateway経由で評価データを取得します。
+    同じ出席番号・期間の結果は60秒間キャッシュします。
+    """
+    # AWS SigV4認証を使用してリクエストを送信
+    # 注: 実際の環境では、API GatewayのIAM認証を使用する場合は
+    # boto3のsignerを使用してリクエストに署名する必要があります
+    response = HTTP.get(
+        f"{api_endpoint}/evaluation",
+        params={"students_id": students_id, "period": period},
+        timeout=HTTP_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json()
+
 # セッション状態の初期化
 if 'evaluation_data' not in st.session_state:
     st.session_state.evaluation_data = None
@@ -22,26 +82,21 @@ with st.sidebar:
     use_profile = st.checkbox("AWS プロファイルを使用", value=True)
     
     if use_profile:
-        profile_name = st.text_input("AWS プロファイル名", "default")
         # プロファイルを使用してセッションを作成
-        try:
-            session = boto3.Session(profile_name=profile_name, region_name=aws_region)
-        except Exception as e:
-            st.error(f"AWS認証エラー: {str(e)}")
-            session = None
+        profile_name = st.text_input("AWS プロファイル名", "default")
+        aws_access_key = aws_secret_key = None
     else:
+        # 認証情報を使用してセッションを作成
+        profile_name = None
         aws_access_key = st.text_input("AWS アクセスキー", type="password")
         aws_secret_key = st.text_input("AWS シークレットキー", type="password")
-        # 認証情報を使用してセッションを作成
-        try:
-            session = boto3.Session(
-                aws_access_key_id=aws_access_key,
-                aws_secret_access_key=aws_secret_key,
-                region_name=aws_region
-            )
-        except Exception as e:
-            st.error(f"AWS認証エラー: {str(e)}")
-            session = None
+
+    # 入力値が変わらない限り、再実行をまたいで同じセッションが返される
+    try:
+        session = get_session(profile_name, aws_region, aws_access_key, aws_secret_key)
+    except Exception as e:
+        st.error(f"AWS認証エラー: {str(e)}")
+        session = None
 
 # メイン画面のレイアウト
 col1, col2 = st.columns([1, 2])
@@ -74,28 +129,13 @@ with col1:
             try:
                 # API Gatewayを使用してデータを取得
                 if session:
-                    client = session.client('apigatewaymanagementapi')
                     # 実際のAPIリクエストはboto3ではなくrequestsを使用するのが一般的
-                    import requests
-                    
-                    # API Gatewayエンドポイントを呼び出し
-                    url = f"{api_endpoint}/evaluation"
-                    params = {
-                        "students_id": students_id,
-                        "period": period
-                    }
-                    
-                    # AWS SigV4認証を使用してリクエストを送信
-                    # 注: 実際の環境では、API GatewayのIAM認証を使用する場合は
-                    # boto3のsignerを使用してリクエストに署名する必要があります
-                    response = requests.get(url, params=params)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
+                    try:
+                        data = fetch_evaluation(api_endpoint, students_id, period)
                         st.session_state.evaluation_data = data
                         st.success("データを取得しました！")
-                    else:
-                        st.error(f"データ取得エラー: {response.status_code} - {response.text}")
+                    except requests.HTTPError as e:
+                        st.error(f"データ取得エラー: {e.response.status_code} - {e.response.text}")
                 else:
                     # デモ用のモックデータ（AWS認証がない場合）
                     st.session_state.evaluation_data = {
@@ -138,8 +178,6 @@ with col2:
                 try:
                     # API Gatewayを使用してデータを更新
                     if session:
-                        import requests
-                        
                         # API Gatewayエンドポイントを呼び出し
                         url = f"{api_endpoint}/evaluation"
                         payload = {
@@ -149,11 +187,12 @@ with col2:
                         }
                         
                         # PUTリクエストを送信
-                        response = requests.put(url, json=payload)
+                        response = HTTP.put(url, json=payload, timeout=HTTP_TIMEOUT)
                         
                         if response.status_code == 200:
-                            # 成功したら評価データを更新
+                            # 成功したら評価データを更新し、古い取得結果のキャッシュを破棄
                             st.session_state.evaluation_data['teacher_evaluation'] = new_teacher_eval
+                            fetch_evaluation.clear()
                             st.success("評価を保存しました！")
                         else:
                             st.error(f"保存エラー: {response.status_code} - {response.text}")